@@ -4,45 +4,77 @@ OBS Countdown Timer Script
 Generates OUTPUT.txt for OBS text source display
 """
 
+import _thread
 import argparse
+import codecs
+import os
+import queue
 import sys
+import threading
 import time
 from datetime import datetime, timedelta
 from pathlib import Path
 
-try:
-    from pynput import keyboard
-    HAS_PYNPUT = True
-except ImportError:
-    HAS_PYNPUT = False
+if sys.platform == 'win32':
+    import msvcrt
+else:
+    import select
+    import termios
+    import tty
 
 OUTPUT_FILE = Path(__file__).parent / "OUTPUT.txt"
+OUTPUT_TMP_FILE = OUTPUT_FILE.with_suffix('.tmp')
+NS_PER_SECOND = 1_000_000_000
+OUTPUT_TABLE_LIMIT = 24 * 3600  # Largest precomputed display value, in seconds
+SWAP_RETRY_DELAY = 0.1  # Seconds before retrying a swap Windows refused
+KEY_POLL_INTERVAL = 0.05  # Seconds between msvcrt.kbhit() checks on Windows
+
+_last_written = None  # Last bytes written to OUTPUT_FILE
+_output_fd = None  # OUTPUT_FILE kept open by open_output()
+_output_size = 0  # Current length of OUTPUT_FILE in bytes
+_output_queue = None  # Updates waiting for the writer thread
+_output_writer = None  # Writer thread started by open_output()
+_O_BINARY = getattr(os, 'O_BINARY', 0)  # No newline translation on Windows
+
+if hasattr(os, 'pwrite'):
+    def _write_at_start(fd: int, data: bytes):
+        os.pwrite(fd, data, 0)
+else:  # Windows has no pwrite
+    def _write_at_start(fd: int, data: bytes):
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.write(fd, data)
 
 
 class TimerState:
     """Holds the current state of the timer"""
+    __slots__ = ('running', 'paused', 'restart_requested', 'quit_requested',
+                 'awaiting_confirm', 'pause_start', 'total_paused', 'wake')
+
     def __init__(self):
         self.running = True
         self.paused = False
         self.restart_requested = False
         self.quit_requested = False
         self.awaiting_confirm = None  # 'restart' or 'quit'
-        self.pause_start = None  # When pause started
-        self.total_paused = 0  # Total paused seconds
+        self.pause_start = None  # time.monotonic_ns() when pause started
+        self.total_paused = 0  # Total paused nanoseconds
+        self.wake = threading.Event()  # Set by key presses to interrupt waits
 
 
 def parse_time(time_str: str) -> int:
     """Parse time string to total seconds"""
-    parts = time_str.split(':')
-    if len(parts) == 1:
-        return int(parts[0])
-    elif len(parts) == 2:
-        minutes, seconds = int(parts[0]), int(parts[1])
+    # Locate the separators directly instead of building a list with split()
+    i = time_str.find(':')
+    j = time_str.find(':', i + 1) if i >= 0 else -1
+    if i < 0:
+        return int(time_str)
+    elif j < 0:
+        minutes, seconds = int(time_str[:i]), int(time_str[i + 1:])
         if seconds >= 60:
             raise ValueError("Seconds must be < 60 when using mm:ss format")
         return minutes * 60 + seconds
-    elif len(parts) == 3:
-        hours, minutes, seconds = int(parts[0]), int(parts[1]), int(parts[2])
+    elif time_str.find(':', j + 1) < 0:
+        hours, minutes, seconds = int(time_str[:i]), int(time_str[i + 1:j]), int(time_str[j + 1:])
         if minutes >= 60 or seconds >= 60:
             raise ValueError("Minutes and seconds must be < 60 when using hh:mm:ss format")
         return hours * 3600 + minutes * 60 + seconds
@@ -55,72 +87,307 @@ def parse_date(date_str: str) -> datetime:
     if not date_str or date_str.lower() == 'null':
         return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
 
-    parts = date_str.split('/')
-    now = datetime.now()
-    if len(parts) == 2:
-        month, day = int(parts[0]), int(parts[1])
-        return datetime(now.year, month, day)
-    elif len(parts) == 3:
-        year, month, day = int(parts[0]), int(parts[1]), int(parts[2])
+    i = date_str.find('/')
+    j = date_str.find('/', i + 1) if i >= 0 else -1
+    if i < 0:
+        raise ValueError("Invalid date format")
+    elif j < 0:
+        month, day = int(date_str[:i]), int(date_str[i + 1:])
+        return datetime(datetime.now().year, month, day)
+    elif date_str.find('/', j + 1) < 0:
+        year, month, day = int(date_str[:i]), int(date_str[i + 1:j]), int(date_str[j + 1:])
         return datetime(year, month, day)
     else:
         raise ValueError("Invalid date format")
 
 
-def format_time(total_seconds: int, display_mode: int) -> str:
-    """Format seconds to display string based on display mode"""
-    if total_seconds < 0:
-        total_seconds = 0
+# Output is pure ASCII, so it is assembled directly as bytes
+_DIGITS = [b"%d" % i for i in range(100)]
+_DIGITS_PADDED = [b"%02d" % i for i in range(100)]
 
-    hours = total_seconds // 3600
-    minutes = (total_seconds % 3600) // 60
-    seconds = total_seconds % 60
 
-    if display_mode == 0:
-        # Shortest format, no leading zeros on hours/minutes
-        if hours > 0:
-            return f"{hours}:{minutes:02d}:{seconds:02d}"
-        elif minutes > 0:
-            return f"{minutes}:{seconds:02d}"
-        else:
-            return str(seconds)
-    elif display_mode == 1:
-        # Shortest but keep leading zeros except hours
-        if hours > 0:
-            return f"{hours}:{minutes:02d}:{seconds:02d}"
-        elif minutes > 0:
-            return f"{minutes:02d}:{seconds:02d}"
-        else:
-            return f"{seconds:02d}"
-    else:  # display_mode == 2
-        # Full format with leading zeros
-        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+def _format_shortest(total_seconds: int) -> bytes:
+    """Display mode 0: shortest format, no leading zeros on hours/minutes"""
+    hours, rem = divmod(total_seconds, 3600)
+    minutes, seconds = divmod(rem, 60)
+    if hours > 0:
+        hh = _DIGITS[hours] if hours < 100 else b"%d" % hours
+        return hh + b":" + _DIGITS_PADDED[minutes] + b":" + _DIGITS_PADDED[seconds]
+    elif minutes > 0:
+        return _DIGITS[minutes] + b":" + _DIGITS_PADDED[seconds]
+    else:
+        return _DIGITS[seconds]
+
+
+def _format_padded(total_seconds: int) -> bytes:
+    """Display mode 1: shortest but keep leading zeros except hours"""
+    hours, rem = divmod(total_seconds, 3600)
+    minutes, seconds = divmod(rem, 60)
+    if hours > 0:
+        hh = _DIGITS[hours] if hours < 100 else b"%d" % hours
+        return hh + b":" + _DIGITS_PADDED[minutes] + b":" + _DIGITS_PADDED[seconds]
+    elif minutes > 0:
+        return _DIGITS_PADDED[minutes] + b":" + _DIGITS_PADDED[seconds]
+    else:
+        return _DIGITS_PADDED[seconds]
 
 
-def write_output(text: str):
-    """Write text to OUTPUT.txt"""
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        f.write(text)
+def _format_full(total_seconds: int) -> bytes:
+    """Display mode 2: full format with leading zeros"""
+    hours, rem = divmod(total_seconds, 3600)
+    minutes, seconds = divmod(rem, 60)
+    hh = _DIGITS_PADDED[hours] if hours < 100 else b"%d" % hours
+    return hh + b":" + _DIGITS_PADDED[minutes] + b":" + _DIGITS_PADDED[seconds]
 
 
-def create_keyboard_listener(state: TimerState):
-    """Create keyboard listener for r/p/q keys"""
-    def on_press(key):
+# Formatter for each display mode; _make_formatter picks one per run
+_FORMATTERS = (_format_shortest, _format_padded, _format_full)
+
+
+def _make_formatter(display_mode: int, max_seconds: int):
+    """Return a formatter for display_mode with 0..max_seconds precomputed"""
+    fmt = _FORMATTERS[display_mode]
+    table = [fmt(s) for s in range(min(max_seconds, OUTPUT_TABLE_LIMIT) + 1)]
+    size = len(table)
+
+    def lookup(total_seconds: int) -> bytes:
+        # A negative index would return the end of the table
+        if total_seconds < 0:
+            total_seconds = 0
+        if total_seconds < size:
+            return table[total_seconds]
+        # Each value is shown only once, so there is nothing to cache
+        return fmt(total_seconds)
+
+    return lookup
+
+
+def _open_output_fd():
+    """Keep OUTPUT.txt open so updates can rewrite it in place"""
+    global _output_fd, _output_size
+    _output_fd = os.open(OUTPUT_FILE, os.O_WRONLY | os.O_CREAT | _O_BINARY, 0o644)
+    _output_size = os.fstat(_output_fd).st_size
+
+
+def _close_output_fd():
+    """Close the descriptor opened by _open_output_fd()"""
+    global _output_fd
+    if _output_fd is not None:
+        os.close(_output_fd)
+        _output_fd = None
+
+
+def _replace_output(data: bytes) -> bool:
+    """Write a temp file and swap it in so OBS never sees a partial file
+
+    Returns False if the swap was refused and OUTPUT.txt is unchanged.
+    """
+    global _output_size
+    fd = os.open(OUTPUT_TMP_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_BINARY, 0o644)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+    # The kept descriptor would point at the old file (and on Windows it
+    # blocks the swap), so close it and reopen afterwards
+    reopen = _output_fd is not None
+    _close_output_fd()
+    try:
+        os.replace(OUTPUT_TMP_FILE, OUTPUT_FILE)
+    except PermissionError:
+        # Windows also refuses while OBS has the file open. Rewriting in
+        # place could show OBS a torn value ('590' for '59'), so leave the
+        # old value and let the caller retry.
+        os.remove(OUTPUT_TMP_FILE)
+        return False
+    finally:
+        if reopen:
+            _open_output_fd()
+    _output_size = len(data)
+    return True
+
+
+def _write_data(data: bytes) -> bool:
+    """Write data to OUTPUT.txt, returns False if it has to be retried"""
+    if _output_fd is not None and len(data) == _output_size:
+        # Same length: overwrite in place, no truncate or rename needed
+        _write_at_start(_output_fd, data)
+        return True
+    return _replace_output(data)
+
+
+def _write_queued(data: bytes) -> bool:
+    """Write an update for the writer thread, returns False to retry it"""
+    try:
+        return _write_data(data)
+    except OSError as e:
+        print(f"\nError writing {OUTPUT_FILE.name}: {e}")
+        return True
+
+
+def _output_writer_loop(pending: queue.Queue):
+    """Writer thread: write queued updates until None is received"""
+    retry = None  # Update whose swap was refused
+    while True:
         try:
-            char = key.char.lower() if hasattr(key, 'char') and key.char else None
-        except AttributeError:
+            data = pending.get(timeout=None if retry is None else SWAP_RETRY_DELAY)
+        except queue.Empty:
+            data = retry  # Nothing newer arrived, try the swap again
+        if data is None:
+            if retry is not None:
+                # Last chance for the final value, e.g. 0 at "Time's up!"
+                _write_queued(retry)
+            break
+        retry = None if _write_queued(data) else data
+
+
+def open_output():
+    """Open OUTPUT.txt and start the writer thread used by write_output()"""
+    global _output_queue, _output_writer
+    _open_output_fd()
+    # Size 1: a slow disk only delays the newest value, older ones are dropped
+    _output_queue = queue.Queue(maxsize=1)
+    _output_writer = threading.Thread(target=_output_writer_loop, args=(_output_queue,), daemon=True)
+    _output_writer.start()
+
+
+def close_output():
+    """Finish pending writes, stop the writer thread and close OUTPUT.txt"""
+    global _output_queue, _output_writer
+    if _output_writer is not None:
+        _output_queue.put(None)
+        _output_writer.join()
+        _output_queue = None
+        _output_writer = None
+    _close_output_fd()
+
+
+def write_output(data: bytes):
+    """Write data to OUTPUT.txt, skipping writes that would not change it"""
+    global _last_written
+    if data == _last_written:
+        return
+
+    if _output_queue is None:
+        if not _write_data(data):
             return
+    else:
+        # Hand off to the writer thread, replacing any value it has not taken yet
+        while True:
+            try:
+                _output_queue.put_nowait(data)
+                break
+            except queue.Full:
+                try:
+                    _output_queue.get_nowait()
+                except queue.Empty:
+                    pass
+    _last_written = data
+
+
+class KeyboardListener:
+    """Reads single key presses from this terminal on a background thread"""
+    def __init__(self, on_press):
+        self.on_press = on_press
+        run = self._run_windows if sys.platform == 'win32' else self._run_posix
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._saved_attrs = None  # Terminal settings restored by stop()
+        self._stop_r = self._stop_w = None  # Pipe that wakes select() in stop()
+        self._escape = None  # Escape sequence state: None, 'esc' or 'seq'
+        self._stopped = threading.Event()  # Ends the Windows polling loop
+
+    def start(self):
+        if sys.platform != 'win32':
+            fd = sys.stdin.fileno()
+            self._saved_attrs = termios.tcgetattr(fd)
+            # Deliver keys one at a time without echo; Ctrl+C still works
+            tty.setcbreak(fd)
+            self._stop_r, self._stop_w = os.pipe()
+        self._thread.start()
+
+    def stop(self):
+        if sys.platform == 'win32':
+            self._stopped.set()
+            self._thread.join()
+            return
+        os.write(self._stop_w, b"x")
+        self._thread.join()
+        termios.tcsetattr(sys.stdin.fileno(), termios.TCSADRAIN, self._saved_attrs)
+        os.close(self._stop_r)
+        os.close(self._stop_w)
+
+    def _run_windows(self):
+        # A blocking getwch() keeps the console in raw mode, where Ctrl+C
+        # arrives as '\x03' instead of a signal. Only call it when a key is
+        # waiting, so Ctrl+C raises KeyboardInterrupt as usual.
+        while not self._stopped.wait(KEY_POLL_INTERVAL):
+            while msvcrt.kbhit():
+                char = msvcrt.getwch()
+                if char == '\x03':
+                    # Ctrl+C read while getwch() had the console
+                    _thread.interrupt_main()
+                elif char in ('\x00', '\xe0'):
+                    # Arrow/function key: skip its second code
+                    msvcrt.getwch()
+                else:
+                    self.on_press(char)
+
+    def _run_posix(self):
+        fd = sys.stdin.fileno()
+        # Incremental, so a character split across two reads still decodes
+        decoder = codecs.getincrementaldecoder('utf-8')('ignore')
+        while True:
+            ready, _, _ = select.select([fd, self._stop_r], [], [])
+            if self._stop_r in ready:
+                return
+            data = os.read(fd, 32)
+            if not data:
+                return
+            for char in decoder.decode(data):
+                self._feed(char)
+
+    def _feed(self, char: str):
+        """Pass a key to on_press, skipping arrow/function key escape sequences
+
+        These arrive as ESC, '[' or 'O', optional parameters and a final
+        byte, e.g. F1 is ESC O P. The state is kept across reads, so a
+        sequence split between two reads is still skipped.
+        """
+        if self._escape == 'seq':
+            # Parameter bytes (digits, ';', ...) continue, anything else ends it
+            if not '\x20' <= char <= '\x3f':
+                self._escape = None
+        elif self._escape == 'esc':
+            if char in '[O':
+                self._escape = 'seq'
+            elif char != '\x1b':
+                # Not a sequence (a lone Esc press), pass the key through
+                self._escape = None
+                self.on_press(char)
+        elif char == '\x1b':
+            self._escape = 'esc'
+        else:
+            self.on_press(char)
+
+
+def create_keyboard_listener(state: TimerState):
+    """Create keyboard listener for r/p/q keys"""
+    def on_press(char):
+        char = char.lower()
 
-        if state.awaiting_confirm:
+        awaiting = state.awaiting_confirm
+        if awaiting:
             if char == 'y':
-                if state.awaiting_confirm == 'restart':
+                if awaiting == 'restart':
                     state.restart_requested = True
-                elif state.awaiting_confirm == 'quit':
+                elif awaiting == 'quit':
                     state.quit_requested = True
                 state.awaiting_confirm = None
             elif char == 'n':
                 print("\nCancelled.")
                 state.awaiting_confirm = None
+            state.wake.set()
             return
 
         if char == 'r':
@@ -130,101 +397,173 @@ def create_keyboard_listener(state: TimerState):
             if state.paused:
                 # Resuming - calculate paused duration
                 if state.pause_start:
-                    state.total_paused += (datetime.now() - state.pause_start).total_seconds()
+                    state.total_paused += time.monotonic_ns() - state.pause_start
                     state.pause_start = None
                 state.paused = False
                 print("\nResumed")
             else:
                 # Pausing - record start time
-                state.pause_start = datetime.now()
+                state.pause_start = time.monotonic_ns()
                 state.paused = True
                 print("\nPaused")
         elif char == 'q':
             print("\nQuit? (y/n): ", end='', flush=True)
             state.awaiting_confirm = 'quit'
+        state.wake.set()
+
+    return KeyboardListener(on_press)
+
+
+def _show(output: bytes):
+    """Write a new value to OUTPUT.txt and the console line"""
+    write_output(output)
+    sys.stdout.write(f"\r{output.decode('ascii')}    ")
+    sys.stdout.flush()
+
+
+def _time_up(state: TimerState, fmt):
+    """Show zero and stop the timer once a countdown reaches its end"""
+    write_output(fmt(0))
+    print("\nTime's up!")
+    state.running = False
+
+
+def _run_mode0(state: TimerState, fmt, deadline: int):
+    """Mode 0 loop: countdown to a time point, as a time.time_ns() deadline"""
+    last_display_seconds = None
+    while not state.quit_requested and not state.restart_requested:
+        # Wall clock on purpose: the target is a time of day, so the countdown
+        # must follow suspend/resume and clock corrections
+        remaining = deadline - time.time_ns()
+        if remaining <= 0:
+            _time_up(state, fmt)
+            return
+        # Round up so the display reaches 0 exactly at the deadline, and
+        # wake exactly when it drops to the next value
+        display_seconds = -(-remaining // NS_PER_SECOND)
+        tick_ns = remaining - (display_seconds - 1) * NS_PER_SECOND
+
+        # Key presses also wake the loop; only refresh on a new value
+        if display_seconds != last_display_seconds:
+            _show(fmt(display_seconds))
+            last_display_seconds = display_seconds
+
+        # Sleep until the displayed value changes or a key is pressed
+        state.wake.wait(timeout=tick_ns / NS_PER_SECOND)
+        state.wake.clear()
+
+
+def _run_mode1(state: TimerState, fmt, duration: int):
+    """Mode 1 loop: countdown from a duration in nanoseconds"""
+    start_time = time.monotonic_ns()
+    last_display_seconds = None
+    while not state.quit_requested and not state.restart_requested:
+        if state.paused:
+            # Wait for a key press; bounded so Ctrl+C still gets through on Windows
+            state.wake.wait(timeout=1)
+            state.wake.clear()
+            continue
+
+        # Integer nanoseconds, converted to seconds only for display
+        remaining = duration - (time.monotonic_ns() - start_time - state.total_paused)
+        if remaining <= 0:
+            _time_up(state, fmt)
+            return
+        # Round up so the display reaches 0 exactly at the deadline, and
+        # wake exactly when it drops to the next value
+        display_seconds = -(-remaining // NS_PER_SECOND)
+        tick_ns = remaining - (display_seconds - 1) * NS_PER_SECOND
+
+        if display_seconds != last_display_seconds:
+            _show(fmt(display_seconds))
+            last_display_seconds = display_seconds
+
+        state.wake.wait(timeout=tick_ns / NS_PER_SECOND)
+        state.wake.clear()
+
+
+def _run_mode2(state: TimerState, fmt):
+    """Mode 2 loop: count up from now"""
+    start_time = time.monotonic_ns()
+    last_display_seconds = None
+    while not state.quit_requested and not state.restart_requested:
+        if state.paused:
+            state.wake.wait(timeout=1)
+            state.wake.clear()
+            continue
+
+        elapsed = time.monotonic_ns() - start_time - state.total_paused
+        display_seconds, tick_ns = divmod(elapsed, NS_PER_SECOND)
 
-    return keyboard.Listener(on_press=on_press)
+        if display_seconds != last_display_seconds:
+            _show(fmt(display_seconds))
+            last_display_seconds = display_seconds
+
+        state.wake.wait(timeout=(NS_PER_SECOND - tick_ns) / NS_PER_SECOND)
+        state.wake.clear()
 
 
 def run_timer(mode: int, time_str: str, date_str: str, display: int):
     """Main timer loop"""
     state = TimerState()
+    fmt = None  # Built on the first start; restarts never need a larger table
 
     # Setup keyboard listener
     listener = None
-    if HAS_PYNPUT:
+    if sys.stdin.isatty():
         listener = create_keyboard_listener(state)
         listener.start()
         print("Keys: [r]estart, [p]ause, [q]uit")
     else:
-        print("Warning: pynput not installed, keyboard controls disabled")
-
-    while state.running:
-        state.restart_requested = False
-        state.total_paused = 0
-        state.pause_start = None
-        state.paused = False
-
-        # Calculate target based on mode
-        if mode == 0:
-            # Countdown to specific time point
-            target_date = parse_date(date_str)
-            time_seconds = parse_time(time_str)
-            target_time = target_date + timedelta(seconds=time_seconds)
-        elif mode == 1:
-            # Countdown from duration
-            duration = parse_time(time_str)
-            start_time = datetime.now()
-        else:  # mode == 2
-            # Count up
-            start_time = datetime.now()
-
-        print(f"Timer started (Mode {mode})")
-
-        while not state.quit_requested and not state.restart_requested:
-            if state.paused and mode != 0:
-                # When paused (except mode 0), just sleep
-                time.sleep(0.1)
-                continue
-
-            now = datetime.now()
+        print("Warning: stdin is not a terminal, keyboard controls disabled")
 
+    try:
+        open_output()
+        while state.running:
+            state.restart_requested = False
+            state.total_paused = 0
+            state.pause_start = None
+            state.paused = False
+
+            # Each mode has its own loop so the tick never branches on mode
             if mode == 0:
-                remaining = (target_time - now).total_seconds()
-                display_seconds = max(0, int(remaining))
-                if remaining <= 0:
-                    write_output(format_time(0, display))
-                    print("\nTime's up!")
-                    state.running = False
-                    break
+                # Countdown to specific time point
+                target_date = parse_date(date_str)
+                time_seconds = parse_time(time_str)
+                target_time = target_date + timedelta(seconds=time_seconds)
+                # timestamp() resolves the local time, including DST
+                deadline = int(target_time.timestamp() * NS_PER_SECOND)
+                if fmt is None:
+                    until_target = deadline - time.time_ns()
+                    fmt = _make_formatter(display, max(0, -(-until_target // NS_PER_SECOND)))
+                print(f"Timer started (Mode {mode})")
+                _run_mode0(state, fmt, deadline)
             elif mode == 1:
-                elapsed = (now - start_time).total_seconds() - state.total_paused
-                remaining = duration - elapsed
-                display_seconds = max(0, int(remaining))
-                if remaining <= 0:
-                    write_output(format_time(0, display))
-                    print("\nTime's up!")
-                    state.running = False
-                    break
+                # Countdown from duration
+                duration_seconds = parse_time(time_str)
+                duration = duration_seconds * NS_PER_SECOND
+                if fmt is None:
+                    fmt = _make_formatter(display, duration_seconds)
+                print(f"Timer started (Mode {mode})")
+                _run_mode1(state, fmt, duration)
             else:  # mode == 2
-                elapsed = (now - start_time).total_seconds() - state.total_paused
-                display_seconds = int(elapsed)
-
-            output = format_time(display_seconds, display)
-            write_output(output)
-            print(f"\r{output}    ", end='', flush=True)
-
-            time.sleep(0.1)
-
-        if state.quit_requested:
-            print("\nExiting...")
-            state.running = False
-
-        if state.restart_requested:
-            print("\nRestarting...")
-
-    if listener:
-        listener.stop()
+                # Count up; the first hour is precomputed, later values formatted on demand
+                if fmt is None:
+                    fmt = _make_formatter(display, 3600)
+                print(f"Timer started (Mode {mode})")
+                _run_mode2(state, fmt)
+
+            if state.quit_requested:
+                print("\nExiting...")
+                state.running = False
+
+            if state.restart_requested:
+                print("\nRestarting...")
+    finally:
+        close_output()
+        # Always restore the terminal, also on Ctrl+C
+        if listener:
+            listener.stop()
     print("Timer stopped.")
 
 
@@ -349,7 +688,7 @@ def main():
         run_timer(mode, time_str, date_str, display)
     except KeyboardInterrupt:
         print("\nInterrupted by user")
-        write_output("")
+        write_output(b"")
     except Exception as e:
         print(f"\nError: {e}")
         sys.exit(1)